@@ -36,6 +36,14 @@ class Game:
         """
         raise NotImplementedError
 
+    def state_is_winner(self, state: GameState, player: str) -> bool:
+        """
+        Return whether player has won the game at state.
+
+        Precondition: player is 'p1' or 'p2'.
+        """
+        raise NotImplementedError
+
     def str_to_move(self, string: str) -> Any:
         """
         Return the move that string represents. If string is not a move,
@@ -25,7 +25,8 @@ playable_games = {'s': SubtractSquareGame,
 usable_strategies = {'i': interactive_strategy,
                      'ro': rough_outcome_strategy,
                      'mr': minimax_recursive,
-                     'mi': minimax_iterative}
+                     'mi': minimax_iterative,
+                     'md': minimax_iterative_deepening}
 
 
 class GameInterface:
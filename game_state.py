@@ -19,6 +19,7 @@ class GameState:
     LOSE: int = -1
     DRAW: int = 0
     p1_turn: bool
+    __slots__ = ('p1_turn',)
 
     def __init__(self, is_p1_turn: bool) -> None:
         """
@@ -40,6 +41,13 @@ class GameState:
         """
         raise NotImplementedError
 
+    def get_ordered_moves(self) -> list:
+        """
+        Return all possible moves that can be applied to this state, with the
+        most promising moves first.
+        """
+        return self.get_possible_moves()
+
     def get_current_player_name(self) -> str:
         """
         Return 'p1' if the current player is Player 1, and 'p2' if the current
@@ -68,6 +76,19 @@ class GameState:
         """
         raise NotImplementedError
 
+    def __eq__(self, other: Any) -> bool:
+        """
+        Return whether this state is equivalent to other.
+        """
+        return (type(self) == type(other)
+                and self.__repr__() == other.__repr__())
+
+    def __hash__(self) -> int:
+        """
+        Return a hash of this state consistent with __eq__.
+        """
+        return hash(self.__repr__())
+
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
@@ -1,27 +1,43 @@
 """module for StonehengeGame and StonehengeState class
 """
-from typing import Dict, Any, List
-import copy
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+import random
 from game import Game
 from game_state import GameState
 
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+SPACE4, SPACE7 = 4 * ' ', 7 * ' '
+
+
+class Layout(NamedTuple):
+    """The ley-lines of a stonehenge grid
+
+    ===Attributes===
+    length - side-length of the grid
+    ley_lines - the cells on each ley-line
+    cell_lines - the ley-lines each cell is on
+    line_masks - bitmask of the cells on each ley-line
+    half_x2 - twice the number of ley-lines a player needs to win
+    """
+    length: int
+    ley_lines: List[List[int]]
+    cell_lines: List[List[int]]
+    line_masks: List[int]
+    half_x2: int
+
+
+ZOBRIST: Dict[Any, int] = {}
+BOARD_TABLE: Dict[int, Layout] = {}
+
 
 class StonehengeGame(Game):
     """A stonehenge game
 
     ===Attributes===
     length - side-length of a stonehenge grid
-    rows - rows
-    dowm_left - down-left diagonals
-    down_right - down-right diagonals
     current_state - the state of a stonehenge game at a certain point in time
     """
     length: int
-    rows: Dict[int, list]
-    down_left: Dict[int, list]
-    down_right: Dict[int, list]
-    p1_score: int
-    p2_score: int
     current_state: "StonehengeState"
 
     def __init__(self, is_p1_turn: bool) -> None:
@@ -31,43 +47,7 @@ class StonehengeGame(Game):
         Overrides Game.__init__
         """
         self.length = int(input("Enter the side length of the board: "))
-        self.rows, self.down_left, self.down_right = {}, {}, {}
-        letters, index_letter, num_cells = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 0, 2
-        for i in range(self.length + 1):
-            cells = []
-            for _m in range(num_cells):
-                cells.append(letters[index_letter])
-                index_letter += 1
-            self.rows[i] = ['n', cells]
-            if num_cells > self.length:
-                num_cells -= 1
-            else:
-                num_cells += 1
-        for i in range(self.length + 1):
-            cells = []
-            for l in range(self.length):
-                if i < len(self.rows[l][1]):
-                    cells.append(self.rows[l][1][i])
-            self.down_left[i] = ['n', cells]
-        index = 1
-        for c in self.rows[self.length][1]:
-            self.down_left[index][1].append(c)
-            index += 1
-        for i in range(self.length + 1):
-            cells = []
-            for l in range(self.length):
-                if -1 - i >= -len(self.rows[l][1]):
-                    cells.append(self.rows[l][1][-1 - i])
-            self.down_right[i] = ['n', cells]
-        index = self.length
-        for c in self.rows[self.length][1]:
-            self.down_right[index][1].append(c)
-            index -= 1
-        self.current_state = StonehengeState(is_p1_turn,
-                                             {'rows': self.rows,
-                                              'left': self.down_left,
-                                              'right': self.down_right}, [0, 0],
-                                             self.length)
+        self.current_state = StonehengeState(is_p1_turn, self.length)
 
     def get_instructions(self) -> str:
         """
@@ -89,9 +69,8 @@ class StonehengeGame(Game):
 
         Overrides Game.is_over
         """
-        half_ley_lines = 3 * (self.length + 1) / 2
-        return (state.p1_score >= half_ley_lines
-                or state.p2_score >= half_ley_lines)
+        half_x2 = state.layout.half_x2
+        return state.scores[0] * 2 >= half_x2 or state.scores[1] * 2 >= half_x2
 
     def is_winner(self, player: str) -> bool:
         """
@@ -101,8 +80,18 @@ class StonehengeGame(Game):
 
         Overrides Game.is_winner
         """
-        if self.is_over(self.current_state):
-            return self.current_state.get_current_player_name() != player
+        return self.state_is_winner(self.current_state, player)
+
+    def state_is_winner(self, state: "StonehengeState", player: str) -> bool:
+        """
+        Return whether player has won the game at state.
+
+        Precondition: player is 'p1' or 'p2'.
+
+        Overrides Game.state_is_winner
+        """
+        if self.is_over(state):
+            return state.get_current_player_name() != player
         return False
 
     def str_to_move(self, string: str) -> str:
@@ -120,34 +109,124 @@ class StonehengeGame(Game):
 class StonehengeState(GameState):
     """The state of a stonehenge game at a certain point in time
 
+    Cells are numbered row by row, so cell i is labelled with the i-th
+    capital letter. Ley-lines are numbered rows first, then down-left
+    diagonals, then down-right diagonals.
+
     ===New Attributes===
-    cur_board - what the stonehenge looks like currently
-    p1_score - number of ley-lines captured by player 1
-    p2_score - number of ley-lines captured by player 2
-    length - side-length of a stonehenge grid
+    p1_bits - bitmask of the cells claimed by player 1, bit i for cell i
+    p2_bits - bitmask of the cells claimed by player 2
+    owners - the player who captured each ley-line, or 0 if it is uncaptured
+    scores - number of ley-lines captured by player 1 and by player 2
+    layout - the ley-lines of the grid, shared by all states of its length
+    _zhash - Zobrist hash of the claimed cells, captured ley-lines and turn,
+             or None if not yet computed
+    _moves - the possible moves of this state, or None if not yet known
     """
-    cur_board: Dict[str, Dict[int, list]]
-    p1_score: int
-    p2_score: int
-    length: int
-
-    def __init__(self, is_p1_turn: bool,
-                 cur_board: Dict[str, Dict[int, list]], scores: List[int],
-                 length: int) -> None:
+    p1_bits: int
+    p2_bits: int
+    owners: bytearray
+    scores: List[int]
+    layout: Layout
+    _zhash: Optional[int]
+    _moves: Optional[List[str]]
+    __slots__ = ('p1_bits', 'p2_bits', 'owners', 'scores', 'layout', '_zhash',
+                 '_moves')
+
+    def __init__(self, is_p1_turn: bool, length: int,
+                 board: Optional[Tuple[int, int, bytearray]] = None,
+                 known: Optional[Tuple[int, List[str]]] = None) -> None:
         """Initialize this game state and set the current player based on
-        is_p1_turn
+        is_p1_turn. board is (p1_bits, p2_bits, owners), or None for an
+        empty board. known is the (Zobrist hash, possible moves) of board
+        if they are already known, or None to work them out when needed.
 
         Extends GameState.__init__
 
-        >>> a = StonehengeState(False, {}, [0, 1], 3)
-        >>> a.p1_turn
+        >>> a = StonehengeState(True, 1).make_move('A')
+        >>> b = StonehengeState(False, 1, (a.p1_bits, a.p2_bits, a.owners))
+        >>> b.p1_turn
         False
-        >>> a.p2_score
-        1
+        >>> b.p1_score
+        3
+        >>> b == a
+        True
+        >>> StonehengeState(False, 3).p2_score
+        0
         """
         super().__init__(is_p1_turn)
-        self.cur_board = cur_board.copy()
-        self.p1_score, self.p2_score, self.length = scores[0], scores[1], length
+        self.layout = board_spec(length)
+        if board is None:
+            board = (0, 0, bytearray(len(self.layout.ley_lines)))
+        self.p1_bits, self.p2_bits, self.owners = board
+        self.scores = [self.owners.count(1), self.owners.count(2)]
+        self._zhash, self._moves = (None, None) if known is None else known
+        if self._moves and max(self.scores) * 2 >= self.layout.half_x2:
+            self._moves = []
+
+    @property
+    def length(self) -> int:
+        """Return the side-length of the grid of this state
+        """
+        return self.layout.length
+
+    @property
+    def p1_score(self) -> int:
+        """Return the number of ley-lines captured by player 1
+        """
+        return self.scores[0]
+
+    @property
+    def p2_score(self) -> int:
+        """Return the number of ley-lines captured by player 2
+        """
+        return self.scores[1]
+
+    def __hash__(self) -> int:
+        """Return the Zobrist hash of this state
+
+        >>> a = StonehengeState(True, 1)
+        >>> b = a.make_move('C')
+        >>> hash(b) == hash(StonehengeState(False, 1, (b.p1_bits, b.p2_bits, \
+        b.owners)))
+        True
+        >>> hash(b) == hash(a.make_move('B'))
+        False
+        """
+        if self._zhash is None:
+            self._zhash = self.board_hash()
+        return self._zhash
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether this state has the same board and current player
+        as other
+
+        >>> a = StonehengeState(True, 2).make_move('A').make_move('B')
+        >>> a == StonehengeState(True, 2).make_move('A').make_move('B')
+        True
+        >>> a == StonehengeState(False, 2).make_move('B').make_move('A')
+        False
+        """
+        return (isinstance(other, StonehengeState)
+                and hash(self) == hash(other)
+                and self.p1_turn == other.p1_turn
+                and self.p1_bits == other.p1_bits
+                and self.p2_bits == other.p2_bits
+                and self.owners == other.owners)
+
+    def board_hash(self) -> int:
+        """Return the Zobrist hash of this state computed from scratch
+        """
+        zhash = zobrist('p1_turn') if self.p1_turn else 0
+        for cell in range(len(self.layout.cell_lines)):
+            if self.p1_bits >> cell & 1:
+                zhash ^= zobrist((LETTERS[cell], 1))
+            elif self.p2_bits >> cell & 1:
+                zhash ^= zobrist((LETTERS[cell], 2))
+        for line in range(len(self.owners)):
+            if self.owners[line]:
+                zhash ^= zobrist((line, self.owners[line]))
+        return zhash
 
     def __str__(self) -> str:
         """
@@ -155,16 +234,7 @@ class StonehengeState(GameState):
 
         Overrides GameState.__str__
 
-        >>> rows = {0: ['2', ['A', '2']], 1: ['n', ['C', 'D', 'E']], \
-        2: ['n', ['F', 'G', 'H', 'I']], 3: ['n', ['J', 'K', 'L']]}
-        >>> left = {0: ['n', ['A', 'C', 'F']], \
-        1: ['n', ['2', 'D', 'G', 'J']], 2: ['n', ['E', 'H', 'K']], \
-        3: ['n', ['I', 'L']]}
-        >>> right = {0: ['n', ['2', 'E', 'I']], \
-        1: ['n', ['A', 'D', 'H', 'L']], 2: ['n', ['C', 'G', 'K']], \
-        3: ['n', ['F', 'J']]}
-        >>> a = StonehengeState(False, \
-        {'rows': rows, 'left': left, 'right': right}, [0, 1], 3)
+        >>> a = StonehengeState(False, 3).make_move('B')
         >>> print(a)
                             @       @
         <BLANKLINE>
@@ -178,51 +248,60 @@ class StonehengeState(GameState):
         <BLANKLINE>
                         @       @       @
         """
-        space4, space7 = 4 * ' ', 7 * ' '
-        result = self.length * space4 + ' '
+        length, ley_lines = self.length, self.layout.ley_lines
+        left, right = length + 1, 2 * (length + 1)
+        result = [length * SPACE4 + ' ']
         for i in range(2):
-            result += space7 + self.val_ley_line(self.cur_board['left'][i])
-        result += '\n\n'
-        for i in range(self.length):
-            result += (self.length - 1 - i) * space4
-            result += self.val_ley_line(self.cur_board['rows'][i])
-            for cell in self.cur_board['rows'][i][1]:
-                result += space7 + cell
-            if i + 2 <= self.length:
-                result += space7
-                result += self.val_ley_line(self.cur_board['left'][i + 2])
-            result += '\n\n'
-        result += space4
-        result += self.val_ley_line(self.cur_board['rows'][self.length])
-        for cell in self.cur_board['rows'][self.length][1]:
-            result += space7 + cell
-        result += space7 + self.val_ley_line(self.cur_board['right'][0])
-        result += '\n\n' + 2 * space4 + ' '
-        index = self.length
+            result.append(SPACE7 + self.val_ley_line(left + i))
+        result.append('\n\n')
+        for i in range(length):
+            result.append((length - 1 - i) * SPACE4)
+            result.append(self.val_ley_line(i))
+            for cell in ley_lines[i]:
+                result.append(SPACE7 + self.val_cell(cell))
+            if i + 2 <= length:
+                result.append(SPACE7)
+                result.append(self.val_ley_line(left + i + 2))
+            result.append('\n\n')
+        result.append(SPACE4)
+        result.append(self.val_ley_line(length))
+        for cell in ley_lines[length]:
+            result.append(SPACE7 + self.val_cell(cell))
+        result.append(SPACE7 + self.val_ley_line(right))
+        result.append('\n\n' + 2 * SPACE4 + ' ')
+        index = length
         while index > 0:
-            result += space7 + self.val_ley_line(self.cur_board['right'][index])
+            result.append(SPACE7 + self.val_ley_line(right + index))
             index -= 1
-        return result
+        return ''.join(result)
 
-    def val_ley_line(self, ley_line: list) -> str:
+    def val_ley_line(self, ley_line: int) -> str:
         """Return a string representation of the value of ley_line
 
-        >>> rows = {0: ['n', ['A', 'B']], 1: ['n', ['C', 'D', '1']], \
-        2: ['n', ['F', 'G']]}
-        >>> left = {0: ['n', ['A', 'C']], 1: ['n', ['B', 'D', 'F']], \
-        2: ['1', ['1', 'G']]}
-        >>> right = {0: ['1', ['B', '1']], 1: ['n', ['A', 'D', 'G']], \
-        2: ['n', ['C', 'F']]}
-        >>> a = StonehengeState(False, \
-        {'rows': rows, 'left': left, 'right': right}, [2, 0], 2)
-        >>> a.val_ley_line(a.cur_board['left'][2])
+        >>> a = StonehengeState(True, 2).make_move('E')
+        >>> a.val_ley_line(5)
         '1'
-        >>> a.val_ley_line(a.cur_board['right'][1])
+        >>> a.val_ley_line(7)
         '@'
         """
-        if ley_line[0] == 'n':
+        if not self.owners[ley_line]:
             return '@'
-        return ley_line[0]
+        return str(self.owners[ley_line])
+
+    def val_cell(self, cell: int) -> str:
+        """Return a string representation of the value of cell
+
+        >>> a = StonehengeState(True, 2).make_move('E')
+        >>> a.val_cell(4)
+        '1'
+        >>> a.val_cell(5)
+        'F'
+        """
+        if self.p1_bits >> cell & 1:
+            return '1'
+        elif self.p2_bits >> cell & 1:
+            return '2'
+        return LETTERS[cell]
 
     def get_possible_moves(self) -> List[str]:
         """
@@ -230,35 +309,50 @@ class StonehengeState(GameState):
 
         Overrides GameState.get_possible_moves
 
-        >>> rows = {0: ['2', ['A', '2']], 1: ['n', ['C', 'D', 'E']], \
-        2: ['n', ['F', 'G', 'H', '1']], 3: ['n', ['J', 'K', '2']]}
-        >>> left = {0: ['n', ['A', 'C', 'F']], \
-        1: ['n', ['2', 'D', 'G', 'J']], 2: ['n', ['E', 'H', 'K']], \
-        3: ['1', ['1', '2']]}
-        >>> right = {0: ['n', ['2', 'E', '1']], \
-        1: ['n', ['A', 'D', 'H', '2']], 2: ['n', ['C', 'G', 'K']], \
-        3: ['n', ['F', 'J']]}
-        >>> a = StonehengeState(False, \
-        {'rows': rows, 'left': left, 'right': right}, [1, 1], 3)
+        >>> a = StonehengeState(False, 3).make_move('B').make_move('I')
+        >>> a = a.make_move('L')
         >>> a.get_possible_moves()
         ['A', 'C', 'D', 'E', 'F', 'G', 'H', 'J', 'K']
-        >>> rows = {0: ['1', ['1', 'B']], 1: ['n', ['C']]}
-        >>> left = {0: ['1', ['1']], 1: ['n', ['B', 'C']]}
-        >>> right = {0: ['n', ['B']], 1: ['1', ['1', 'C']]}
-        >>> b = StonehengeState(False, \
-        {'rows': rows, 'left': left, 'right': right}, [3, 0], 1)
+        >>> b = StonehengeState(True, 1).make_move('A')
         >>> b.get_possible_moves()
         []
         """
-        half_ley_lines = 3 * (self.length + 1) / 2
-        if self.p1_score >= half_ley_lines or self.p2_score >= half_ley_lines:
-            return []
-        result = []
-        for index in self.cur_board['rows']:
-            for cell in self.cur_board['rows'][index][1]:
-                if cell != '1' and cell != '2':
-                    result.append(cell)
-        return result
+        if self._moves is None:
+            half_x2 = self.layout.half_x2
+            if self.scores[0] * 2 >= half_x2 or self.scores[1] * 2 >= half_x2:
+                self._moves = []
+            else:
+                claimed = self.p1_bits | self.p2_bits
+                self._moves = [LETTERS[cell]
+                               for cell in range(len(self.layout.cell_lines))
+                               if not claimed >> cell & 1]
+        return self._moves[:]
+
+    def get_ordered_moves(self) -> List[str]:
+        """
+        Return all possible moves sorted by the number of ley-lines each
+        move captures for the current player, then by the number of
+        uncaptured ley-lines the move is on.
+
+        Overrides GameState.get_ordered_moves
+
+        >>> a = StonehengeState(False, 3).make_move('B').make_move('I')
+        >>> a = a.make_move('L')
+        >>> a.get_ordered_moves()
+        ['F', 'E', 'G', 'H', 'J', 'C', 'D', 'K', 'A']
+        """
+        player_bits = self.p1_bits if self.p1_turn else self.p2_bits
+        _, ley_lines, cell_lines, line_masks, _ = self.layout
+        priority = {}
+        for move in self.get_possible_moves():
+            captured, uncaptured = 0, 0
+            for line in cell_lines[ord(move) - ord('A')]:
+                if not self.owners[line]:
+                    captured += (((player_bits & line_masks[line]).bit_count()
+                                  + 1) * 2 >= len(ley_lines[line]))
+                    uncaptured += 1
+            priority[move] = (captured, uncaptured)
+        return sorted(priority, key=lambda move: priority[move], reverse=True)
 
     def make_move(self, move: str) -> 'StonehengeState':
         """
@@ -266,88 +360,51 @@ class StonehengeState(GameState):
 
         Overrides GameState.make_move
 
-        >>> rows = {0: ['2', ['A', '2']], 1: ['n', ['C', 'D', 'E']], \
-        2: ['n', ['F', 'G', 'H', '1']], 3: ['n', ['J', 'K', '2']]}
-        >>> left = {0: ['n', ['A', 'C', 'F']], \
-        1: ['n', ['2', 'D', 'G', 'J']], 2: ['n', ['E', 'H', 'K']], \
-        3: ['1', ['1', '2']]}
-        >>> right = {0: ['n', ['2', 'E', '1']], \
-        1: ['n', ['A', 'D', 'H', '2']], 2: ['n', ['C', 'G', 'K']], \
-        3: ['n', ['F', 'J']]}
-        >>> a = StonehengeState(False, \
-        {'rows': rows, 'left': left, 'right': right}, [1, 1], 3)
-        >>> m = a.make_move('G')
-        >>> m.cur_board['left'][1][0] == '2'
+        >>> a = StonehengeState(False, 3).make_move('B').make_move('I')
+        >>> a = a.make_move('L')
+        >>> m = a.make_move('F')
+        >>> m.owners[2] == 1 and m.owners[11] == 1
         True
-        >>> m.p2_score == 2
+        >>> m.p1_score == 3
         True
         >>> m.p1_turn
+        False
+        >>> a.owners[2] == 0
         True
-        >>> a.cur_board['left'][1][0] == 'n'
-        True
-        >>> a.p2_score == 1
+        >>> a.p1_score == 1
         True
         >>> print(m)
-                            @       2
+                            @       @
         <BLANKLINE>
                 2       A       2       @
         <BLANKLINE>
             @       C       D       E       1
         <BLANKLINE>
-        @       F       2       H       1
+        1       1       G       H       1
         <BLANKLINE>
             @       J       K       2       @
         <BLANKLINE>
-                        @       @       @
+                        1       @       @
         """
-        board = copy.deepcopy(self.cur_board)
-        cur_player = '1'
-        scores = [self.p1_score, self.p2_score]
-        if not self.p1_turn:
-            cur_player = '2'
-        for lines in board:
-            for line in board[lines]:
-                states = board[lines][line]
-                self.move_to_board(scores, states, move, cur_player)
-        return StonehengeState(cur_player == '2', board, scores, self.length)
-
-    def move_to_board(self, player_scores: List[int], cur_states: list,
-                      move: str, cur_player: str) -> None:
-        """Capture cell in cur_state by cur_player if there is such a
-        cell == move. If >= half of the cells in cur_state are captured, add 1
-        score to player_score
-
-        >>> rows = {0: ['2', ['A', '2']], 1: ['n', ['C', 'D', 'E']], \
-        2: ['n', ['F', '2', 'H', '1']], 3: ['n', ['J', 'K', '2']]}
-        >>> left = {0: ['n', ['A', 'C', 'F']], \
-        1: ['2', ['2', 'D', '2', 'J']], 2: ['n', ['E', 'H', 'K']], \
-        3: ['1', ['1', '2']]}
-        >>> right = {0: ['n', ['2', 'E', '1']], \
-        1: ['n', ['A', 'D', 'H', '2']], 2: ['n', ['C', '2', 'K']], \
-        3: ['n', ['F', 'J']]}
-        >>> a = StonehengeState(False, \
-        {'rows': rows, 'left': left, 'right': right}, [1, 1], 3)
-        >>> c = ['n', ['C', '2', 'E']]
-        >>> b = a.move_to_board([1, 0], c, 'E', '2')
-        >>> b is None
-        True
-        >>> c == ['2', ['C', '2', '2']]
-        True
-        """
-        scores = player_scores
-        states = cur_states
-        for cell in range(len(states[1])):
-            if states[1][cell] == move:
-                states[1][cell] = cur_player
-                if (states[0] == 'n'
-                        and states[1].count(cur_player) >= len(states[1]) / 2
-                        and cur_player == '2'):
-                    states[0] = '2'
-                    scores[1] += 1
-                elif (states[0] == 'n'
-                      and states[1].count(cur_player) >= len(states[1]) / 2):
-                    states[0] = '1'
-                    scores[0] += 1
+        cell, cur_player = ord(move) - ord('A'), 1 if self.p1_turn else 2
+        player_bits = (self.p1_bits if self.p1_turn else self.p2_bits
+                       ) | 1 << cell
+        _, ley_lines, cell_lines, line_masks, _ = self.layout
+        owners = self.owners[:]
+        if self._zhash is None:
+            self._zhash = self.board_hash()
+        zhash = self._zhash ^ zobrist('p1_turn') ^ zobrist((move, cur_player))
+        for line in cell_lines[cell]:
+            if (not owners[line]
+                    and (player_bits & line_masks[line]).bit_count() * 2
+                    >= len(ley_lines[line])):
+                owners[line] = cur_player
+                zhash ^= zobrist((line, cur_player))
+        board = ((player_bits, self.p2_bits, owners) if self.p1_turn
+                 else (self.p1_bits, player_bits, owners))
+        return StonehengeState(not self.p1_turn, self.layout.length, board,
+                               (zhash, [x for x in self.get_possible_moves()
+                                        if x != move]))
 
     def __repr__(self) -> Any:
         """
@@ -366,14 +423,7 @@ class StonehengeState(GameState):
 
         Overrides GameState.rough_outcome
 
-        >>> rows = {0: ['1', ['1', 'B']], 1: ['n', ['C', 'D', 'E']], \
-        2: ['n', ['F', 'G']]}
-        >>> left = {0: ['1', ['1', 'C']], 1: ['n', ['B', 'D', 'F']], \
-        2: ['n', ['E', 'G']]}
-        >>> right = {0: ['n', ['B', 'E']], 1: ['n', ['1', 'D', 'G']], \
-        2: ['n', ['C', 'F']]}
-        >>> a = StonehengeState(False, \
-        {'rows': rows, 'left': left, 'right': right}, [2, 0], 2)
+        >>> a = StonehengeState(True, 2).make_move('A')
         >>> a.rough_outcome()
         0
         >>> b = a.make_move('G')
@@ -386,24 +436,93 @@ class StonehengeState(GameState):
         >>> b.rough_outcome()
         1
         """
-        half_ley_lines = 3 * (self.length + 1) / 2
-        if self.get_possible_moves() == []:
+        half_x2 = self.layout.half_x2
+        moves = self.get_possible_moves()
+        if moves == []:
             return self.LOSE
         other_win = True
-        for move in self.get_possible_moves():
+        for move in moves:
             state = self.make_move(move)
-            if (state.p1_score >= half_ley_lines
-                    or state.p2_score >= half_ley_lines):
+            if state.scores[0] * 2 >= half_x2 or state.scores[1] * 2 >= half_x2:
                 return self.WIN
-            elif all([(state.make_move(x).p1_score < half_ley_lines
-                       and state.make_move(x).p2_score < half_ley_lines)
-                      for x in state.get_possible_moves()]):
+            children = [state.make_move(x) for x in state.get_possible_moves()]
+            if all(child.scores[0] * 2 < half_x2
+                   and child.scores[1] * 2 < half_x2 for child in children):
                 other_win = False
         if other_win:
             return self.LOSE
         return self.DRAW
 
 
+def board_layout(length: int) -> Layout:
+    """Return the cells on each ley-line of a stonehenge grid with
+    side-length length, the ley-lines each cell is on, the bitmask of the
+    cells on each ley-line and twice the number of ley-lines needed to win
+
+    >>> a = board_layout(1)
+    >>> a.ley_lines
+    [[0, 1], [2], [0], [1, 2], [1], [0, 2]]
+    >>> a.cell_lines
+    [[0, 2, 5], [0, 3, 4], [1, 3, 5]]
+    >>> a.line_masks
+    [3, 4, 1, 6, 2, 5]
+    >>> a.half_x2
+    6
+    """
+    rows, down_left, down_right = [], [], []
+    index_cell, num_cells = 0, 2
+    for _ in range(length + 1):
+        rows.append(list(range(index_cell, index_cell + num_cells)))
+        index_cell += num_cells
+        if num_cells > length:
+            num_cells -= 1
+        else:
+            num_cells += 1
+    for i in range(length + 1):
+        down_left.append([rows[l][i] for l in range(length)
+                          if i < len(rows[l])])
+        down_right.append([rows[l][-1 - i] for l in range(length)
+                           if -1 - i >= -len(rows[l])])
+    for i in range(len(rows[length])):
+        down_left[i + 1].append(rows[length][i])
+        down_right[length - i].append(rows[length][i])
+    ley_lines = rows + down_left + down_right
+    cell_lines = [[] for _ in range(index_cell)]
+    line_masks = []
+    for line in range(len(ley_lines)):
+        line_masks.append(0)
+        for cell in ley_lines[line]:
+            cell_lines[cell].append(line)
+            line_masks[line] |= 1 << cell
+    return Layout(length, ley_lines, cell_lines, line_masks, len(ley_lines))
+
+
+def board_spec(length: int) -> Layout:
+    """Return board_layout(length), building it only the first time a grid
+    with side-length length is used
+
+    >>> board_spec(2) is board_spec(2)
+    True
+    """
+    if length not in BOARD_TABLE:
+        BOARD_TABLE[length] = board_layout(length)
+    return BOARD_TABLE[length]
+
+
+def zobrist(key: Any) -> int:
+    """Return the random 64-bit Zobrist key of key, which is a cell claimed
+    by a player, a ley-line captured by a player or 'p1_turn'
+
+    >>> zobrist(('A', 1)) == zobrist(('A', 1))
+    True
+    >>> zobrist(('A', 1)) == zobrist(('A', 2))
+    False
+    """
+    if key not in ZOBRIST:
+        ZOBRIST[key] = random.getrandbits(64)
+    return ZOBRIST[key]
+
+
 if __name__ == "__main__":
     from python_ta import check_all
     check_all(config="a2_pyta.txt")
@@ -5,88 +5,18 @@ NOTE: Make sure this file adheres to python-ta.
 Adjust the type annotations as needed, and implement both a recursive
 and an iterative version of minimax.
 """
-from typing import Any, List, Union
+from typing import Any, Dict, List, Optional, Tuple
+import multiprocessing
+import time
 from game import Game
 from game_state import GameState
 
-
-class Stack:
-    """
-    Last-in, first-out (LIFO) stack.
-
-    This code is from lab 3
-    """
-
-    def __init__(self) -> None:
-        """
-        Create a new, empty Stack self.
-
-        >>> s = Stack()
-        """
-        self._contents = []
-
-    def add(self, obj: Union[object, 'Tree']) -> None:
-        """
-        Add object obj to top of Stack self.
-
-        >>> s = Stack()
-        >>> s.add(7)
-        """
-        self._contents.append(obj)
-
-    def remove(self) -> Union[object, 'Tree']:
-        """
-        Remove and return top element of Stack self.
-
-        Assume Stack self is not empty.
-
-        >>> s = Stack()
-        >>> s.add(5)
-        >>> s.add(7)
-        >>> s.remove()
-        7
-        """
-        return self._contents.pop()
-
-    def is_empty(self) -> bool:
-        """
-        Return whether Stack self is empty.
-
-        >>> s = Stack()
-        >>> s.is_empty()
-        True
-        >>> s.add(7)
-        >>> s.is_empty()
-        False
-        """
-        return len(self._contents) == 0
-
-
-class Tree:
-    """Represent a tree
-
-    ===Attributes===
-    children - a list of children of a tree
-    value - the value of a tree
-    score - the score of a tree
-    """
-    value: Union[object, GameState]
-    children: List['Tree']
-    score: int
-
-    def __init__(self, value: Union[object, GameState] = None,
-                 children: List['Tree'] = None, score: int = None) -> None:
-        """Initialize a tree with its value and children
-
-        >>> a = Tree(3)
-        >>> a.value
-        3
-        >>> a.children
-        []
-        """
-        self.value = value
-        self.children = children.copy() if children else []
-        self.score = score
+# Kinds of scores stored in a transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+# A transposition table of (score, kind of score, best move, depth searched)
+TransTable = Dict[GameState, Tuple[int, int, Any, Optional[int]]]
+# Fewest moves left for minimax_recursive to search its root moves in a pool
+PARALLEL_MIN_MOVES = 14
 
 
 def interactive_strategy(game: Game) -> Any:
@@ -140,37 +70,209 @@ def minimax_recursive(game: Game) -> Any:
     """Return the strongest possible move of the current state of game
     recursively
 
+    With at least PARALLEL_MIN_MOVES moves left and more than one CPU, the
+    moves are searched in separate processes; smaller searches are done in
+    this process with one shared transposition table.
+
     Assume game is not over
     """
     old_state = game.current_state
-    scores_possible_moves = [(-1 * max_score(game, old_state.make_move(x)))
-                             for x in old_state.get_possible_moves()]
+    children = [old_state.make_move(x) for x in old_state.get_possible_moves()]
+    if (len(children) >= PARALLEL_MIN_MOVES
+            and multiprocessing.cpu_count() > 1):
+        with multiprocessing.Pool() as pool:
+            scores = pool.map(root_score, [(game, x) for x in children])
+    else:
+        tt = {}
+        scores = [max_score(game, x, tt) for x in children]
+    scores_possible_moves = [(-1 * x) for x in scores]
     index = scores_possible_moves.index(max(scores_possible_moves))
     game.current_state = old_state
     return old_state.get_possible_moves()[index]
 
 
-def max_score(game: Game, state: GameState) -> int:
+def root_score(task: Tuple[Game, GameState]) -> int:
+    """Return max_score of the state in task, searched with a transposition
+    table of its own so that it can run in a separate process
+    """
+    return max_score(task[0], task[1], {})
+
+
+class SearchTimeout(Exception):
+    """Raised by max_score when the deadline of a search has passed
+    """
+
+
+class SearchClock:
+    """The deadline of a search that only looks some moves ahead
+
+    ===Attributes===
+    deadline - the time.monotonic() value at which the search is abandoned
+    cutoffs - the number of states scored by how far ahead the search
+              looked rather than by the end of the game
+    """
+    deadline: float
+    cutoffs: int
+
+    def __init__(self, deadline: float) -> None:
+        """Initialize a search clock that runs out at deadline
+
+        >>> a = SearchClock(2.5)
+        >>> a.deadline
+        2.5
+        >>> a.cutoffs
+        0
+        """
+        self.deadline = deadline
+        self.cutoffs = 0
+
+
+def max_score(game: Game, state: GameState, tt: TransTable,
+              window: Tuple[int, int] = (-1, 1),
+              limit: Optional[Tuple[int, SearchClock]] = None) -> int:
     """Return the score of state if game is over, otherwise return the max
-    score of moves of state
+    score of moves of state. If limit is not None, it is (depth, clock):
+    only search depth more moves ahead, use rough_outcome for the states
+    not over by then, count them in clock.cutoffs and raise SearchTimeout
+    once clock.deadline has passed.
+
+    Moves are searched with alpha-beta pruning, most promising first: a
+    score <= alpha is only an upper bound of the real score and a score >=
+    beta only a lower bound, where window is (alpha, beta). tt is a
+    transposition table of the scores of states already searched, together
+    with EXACT, LOWER or UPPER for the kind of score stored, the best move
+    found and the depth searched, or None if the score does not depend on
+    it. A search cut short by SearchTimeout stores nothing for the states
+    it did not finish.
     """
-    game.current_state = state
+    depth = None
+    if limit is not None:
+        depth = limit[0]
+        if time.monotonic() >= limit[1].deadline:
+            raise SearchTimeout
+    score, (alpha, beta), best_move = tt_lookup(tt, state, window, depth)
+    if score is not None:
+        if depth is not None and tt[state][3] is not None:
+            limit[1].cutoffs += 1
+        return score
     if game.is_over(state):
-        if state.p1_turn:
-            if game.is_winner('p1'):
-                return 1
-            elif game.is_winner('p2'):
-                return -1
-            return 0
+        score = terminal_score(game, state)
+        tt[state] = (score, EXACT, None, None)
+        return score
+    if depth == 0:
+        limit[1].cutoffs += 1
+        score = state.rough_outcome()
+        tt[state] = (score, EXACT, best_move, 0)
+        return score
+    score, window_low, cutoffs, child_limit = -2, alpha, None, None
+    if limit is not None:
+        cutoffs, child_limit = limit[1].cutoffs, (depth - 1, limit[1])
+    for move in ordered_moves(state, best_move):
+        move_score = -1 * max_score(game, state.make_move(move), tt,
+                                    (-beta, -alpha), child_limit)
+        if move_score > score:
+            score, best_move = move_score, move
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+    if cutoffs is not None and limit[1].cutoffs == cutoffs:
+        depth = None
+    tt_store(tt, state, (score, best_move), (window_low, beta), depth)
+    return score
+
+
+def tt_lookup(tt: TransTable, state: GameState, window: Tuple[int, int],
+              depth: Optional[int]
+              ) -> Tuple[Optional[int], Tuple[int, int], Any]:
+    """Return the score of state stored in tt if it decides the (alpha, beta)
+    window of a search depth moves ahead, or None otherwise, together with
+    the window narrowed by the stored score and the best move stored
+    """
+    entry = tt.get(state)
+    if entry is None:
+        return None, window, None
+    score, bound, best_move, searched = entry
+    alpha, beta = window
+    if searched is None or (depth is not None and searched >= depth):
+        if (bound == EXACT or (bound == LOWER and score >= beta)
+                or (bound == UPPER and score <= alpha)):
+            return score, window, best_move
+        elif bound == LOWER:
+            alpha = max(alpha, score)
         else:
-            if game.is_winner('p2'):
-                return 1
-            elif game.is_winner('p1'):
-                return -1
-            return 0
+            beta = min(beta, score)
+    return None, (alpha, beta), best_move
+
+
+def tt_store(tt: TransTable, state: GameState, result: Tuple[int, Any],
+             window: Tuple[int, int], depth: Optional[int]) -> None:
+    """Store result, the (score, best move) of state found by searching
+    depth moves ahead in the window (alpha, beta), in tt
+    """
+    score, best_move = result
+    if score <= window[0]:
+        tt[state] = (score, UPPER, best_move, depth)
+    elif score >= window[1]:
+        tt[state] = (score, LOWER, best_move, depth)
     else:
-        return max([(-1 * max_score(game, state.make_move(x)))
-                    for x in state.get_possible_moves()])
+        tt[state] = (score, EXACT, best_move, depth)
+
+
+def ordered_moves(state: GameState, best_move: Any) -> list:
+    """Return the ordered moves of state, with best_move first if it is not
+    None
+    """
+    moves = state.get_ordered_moves()
+    if best_move is not None:
+        moves.remove(best_move)
+        moves.insert(0, best_move)
+    return moves
+
+
+def terminal_score(game: Game, state: GameState) -> int:
+    """Return 1 if the current player of state has won game, -1 if the
+    other player has and 0 on a tie
+
+    Assume game is over at state
+    """
+    if game.state_is_winner(state, state.get_current_player_name()):
+        return 1
+    elif game.state_is_winner(state, 'p2' if state.p1_turn else 'p1'):
+        return -1
+    return 0
+
+
+def minimax_iterative_deepening(game: Game, time_budget: float = 1.0) -> Any:
+    """Return the strongest move of the current state of game found by
+    searching 1, 2, 3, ... moves ahead until time_budget seconds have passed
+    or a search reaches the end of the game in every line it looks at
+
+    The transposition table is kept between depths, so each depth tries the
+    best moves of the previous one first. A depth still running at the
+    deadline is abandoned and the best move of the last finished depth is
+    returned.
+
+    Assume game is not over
+    """
+    old_state, tt = game.current_state, {}
+    moves = old_state.get_possible_moves()
+    clock, best_move, depth = (SearchClock(time.monotonic() + time_budget),
+                               moves[0], 1)
+    try:
+        while True:
+            clock.cutoffs = 0
+            scores_possible_moves = [
+                (-1 * max_score(game, old_state.make_move(x), tt, (-1, 1),
+                                (depth - 1, clock))) for x in moves]
+            best_move = moves[scores_possible_moves.index(
+                max(scores_possible_moves))]
+            if not clock.cutoffs:
+                break
+            depth += 1
+    except SearchTimeout:
+        pass
+    game.current_state = old_state
+    return best_move
 
 
 def minimax_iterative(game: Game) -> Any:
@@ -179,40 +281,93 @@ def minimax_iterative(game: Game) -> Any:
 
     Assume game is not over
     """
-    old_state = game.current_state
-    process, state = Stack(), Tree(old_state)
-    process.add(state)
-
-    while not process.is_empty():
-        tree = process.remove()
-        game.current_state = tree.value
-        if game.is_over(game.current_state):
-            if not(game.is_winner('p1') or game.is_winner('p2')):
-                tree.score = 0
-            elif game.current_state.p1_turn and game.is_winner('p1'):
-                tree.score = 1
-            elif game.current_state.p1_turn and game.is_winner('p2'):
-                tree.score = -1
-            elif (not game.current_state.p1_turn) and game.is_winner('p2'):
-                tree.score = 1
-            else:
-                tree.score = -1
-        elif tree.children == []:
-            for move in game.current_state.get_possible_moves():
-                next_state = Tree(game.current_state.make_move(move))
-                tree.children.append(next_state)
-            process.add(tree)
-            for child in tree.children:
-                process.add(child)
-        else:
-            tree.score = max([(-1 * x.score) for x in tree.children] + [-1])
-
-    scores_possible_moves = [(-1 * x.score) for x in state.children]
+    old_state, tt = game.current_state, {}
+    scores_possible_moves = [(-1 * iterative_score(game, old_state.make_move(x),
+                                                   tt))
+                             for x in old_state.get_possible_moves()]
     index = scores_possible_moves.index(max(scores_possible_moves))
     game.current_state = old_state
     return old_state.get_possible_moves()[index]
 
 
+class Frame:
+    """A state whose moves are being searched by iterative_score
+
+    ===Attributes===
+    state - the state searched
+    window - the (alpha, beta) window state is searched in
+    alpha - the lower end of the window, raised by the moves searched
+    score - the best score of the moves searched, or -2 before any
+    best_move - the move with that score, or None before any
+    moves - the moves of state, in the order they are searched
+    index - the number of moves searched or being searched
+    """
+    state: GameState
+    window: Tuple[int, int]
+    alpha: int
+    score: int
+    best_move: Any
+    moves: List[Any]
+    index: int
+
+    def __init__(self, state: GameState, window: Tuple[int, int],
+                 moves: List[Any]) -> None:
+        """Initialize a frame for searching moves of state in window
+
+        >>> a = Frame(None, (-1, 0), [1, 2])
+        >>> a.alpha
+        -1
+        >>> a.score
+        -2
+        """
+        self.state, self.window, self.moves = state, window, moves
+        self.alpha, self.score, self.best_move, self.index = (window[0], -2,
+                                                               None, 0)
+
+
+def iterative_score(game: Game, state: GameState, tt: TransTable) -> int:
+    """Return the same score as max_score(game, state, tt), using a stack of
+    frames instead of recursion
+    """
+    process = []
+    score = enter_frame(game, state, tt, (-1, 1), process)
+    while process:
+        frame = process[-1]
+        if score is not None and -1 * score > frame.score:
+            frame.score = -1 * score
+            frame.best_move = frame.moves[frame.index - 1]
+        frame.alpha = max(frame.alpha, frame.score)
+        if frame.alpha >= frame.window[1] or frame.index == len(frame.moves):
+            process.pop()
+            tt_store(tt, frame.state, (frame.score, frame.best_move),
+                     frame.window, None)
+            score = frame.score
+        else:
+            frame.index += 1
+            child = frame.state.make_move(frame.moves[frame.index - 1])
+            score = enter_frame(game, child, tt,
+                                (-frame.window[1], -frame.alpha), process)
+    return score
+
+
+def enter_frame(game: Game, state: GameState, tt: TransTable,
+                window: Tuple[int, int],
+                process: List[Frame]) -> Optional[int]:
+    """Return the score of state if it needs no search in window, otherwise
+    push a Frame for searching the moves of state onto process and return
+    None
+    """
+    score, window, best_move = tt_lookup(tt, state, window, None)
+    if score is not None:
+        return score
+    if game.is_over(state):
+        score = terminal_score(game, state)
+        tt[state] = (score, EXACT, None, None)
+        return score
+    process.append(Frame(state, window, ordered_moves(state, best_move)))
+    return None
+
+
 if __name__ == "__main__":
     from python_ta import check_all
     check_all(config="a2_pyta.txt")
@@ -54,8 +54,23 @@ class SubtractSquareGame(Game):
         :return: Whether player has won or not.
         :rtype: bool
         """
-        return (self.current_state.get_current_player_name() != player
-                and self.is_over(self.current_state))
+        return self.state_is_winner(self.current_state, player)
+
+    def state_is_winner(self, state, player):
+        """
+        Return whether player has won the game at state.
+
+        Precondition: player is 'p1' or 'p2'.
+
+        :param state: The state to check.
+        :type state: SubtractSquareState
+        :param player: The player to check.
+        :type player: str
+        :return: Whether player has won at state or not.
+        :rtype: bool
+        """
+        return (state.get_current_player_name() != player
+                and self.is_over(state))
 
     def str_to_move(self, string):
         """